@@ -0,0 +1,202 @@
+import logging
+import threading
+import time
+from typing import Callable, List
+
+import requests
+from urllib3.exceptions import ConnectTimeoutError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH = 200
+DEFAULT_MAX_DELAY_MS = 500
+DEFAULT_MAX_RETRIES = 3
+
+
+def _was_not_sent(error: Exception) -> bool:
+    """
+    Returns True if error shows that the request never reached the LMS, so it can be sent again
+    without enrolling or emailing anyone twice.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        # Failures to open the connection are wrapped in a MaxRetryError. Other connection errors
+        # (e.g. the connection closed while waiting for the response) may happen after the request was sent.
+        # NewConnectionError is a subclass of ConnectTimeoutError.
+        return isinstance(getattr(error.args[0], 'reason', None), ConnectTimeoutError)
+    return False
+
+
+class BatchingBulkEnroll:
+    """ Groups single enrollment changes into bulk enrollment requests.
+
+    Enrollments are buffered and sent with :meth:`client.OpenedxRESTAPIClient.change_enrollment`, one request per
+    course and set of options, when ``max_batch`` enrollments are pending or ``max_delay_ms`` after the first
+    pending one, whatever happens first.
+
+    Usage example::
+        with BatchingBulkEnroll(client) as batch:
+            for email, course_id in new_enrollments:
+                batch.enroll(email, course_id)
+
+    The responses of the requests sent in the background are passed to ``on_response``. Use :meth:`flush` to
+    send the pending enrollments and get the responses directly.
+
+    Requests that could not connect to the LMS are sent again up to ``max_retries`` times, waiting
+    ``max_delay_ms`` before the first retry and twice as long before each of the next ones. Requests that
+    may have reached the LMS (e.g. on a read timeout) are never sent again, so no one is enrolled or
+    emailed twice. The enrollments of requests that failed are passed to ``on_error``.
+
+    """
+    def __init__(self,
+                 client,
+                 max_batch: int = DEFAULT_MAX_BATCH,
+                 max_delay_ms: int = DEFAULT_MAX_DELAY_MS,
+                 on_response: Callable[[dict], None] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 on_error: Callable[[Exception, dict], None] = None) -> None:
+        """
+        Args:
+            client: :class:`client.OpenedxRESTAPIClient` used to send the requests.
+            max_batch: number of pending enrollments that triggers a flush.
+            max_delay_ms: maximum time in milliseconds an enrollment is kept pending.
+            on_response: called with the response of each request sent by a timed or size triggered flush.
+            max_retries: number of times a request that could not connect to the LMS is sent again.
+            on_error: called with the exception and the `change_enrollment` arguments of each request
+                that failed, e.g. to send it again later with ``client.change_enrollment(**kwargs)``.
+                If not set, the error is logged with the emails of the request.
+        """
+        self.client = client
+        self.max_batch = max_batch
+        self.max_delay_ms = max_delay_ms
+        self.on_response = on_response
+        self.max_retries = max_retries
+        self.on_error = on_error
+
+        # Emails pending, by (course, url, action, auto_enroll, email_students, cohorts).
+        # Dicts are used as ordered sets to skip duplicated emails.
+        self._pending = {}
+        self._pending_count = 0
+        self._timer = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def enroll(self,
+               email: str,
+               course: str,
+               action: str = 'enroll',
+               url: str = None,
+               auto_enroll: bool = True,
+               email_students: bool = True,
+               cohorts: List[str] = None) -> None:
+        """ Queues an enrollment change of email in course.
+
+        Args are the same as :meth:`client.OpenedxRESTAPIClient.change_enrollment`, for a single email and course.
+        """
+        key = (course, url, action, auto_enroll, email_students, tuple(sorted(cohorts or ())))
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BatchingBulkEnroll is closed")
+            emails = self._pending.setdefault(key, {})
+            if email in emails:
+                return
+            emails[email] = None
+            self._pending_count += 1
+            flush_now = self._pending_count >= self.max_batch
+            if not flush_now:
+                self._schedule_flush()
+
+        if flush_now:
+            self._notify(self.flush())
+
+    def flush(self) -> List[dict]:
+        """ Sends all the pending enrollments.
+
+        Requests that could not connect are retried before returning. Requests that failed are passed
+        to ``on_error`` and have no response.
+
+        Returns:
+            list with the response of each request sent, as returned by `change_enrollment`.
+        """
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._pending_count = 0
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        responses = []
+        for (course, url, action, auto_enroll, email_students, cohorts), emails in pending.items():
+            response = self._send(dict(
+                emails=list(emails),
+                courses=[course],
+                action=action,
+                url=url,
+                auto_enroll=auto_enroll,
+                email_students=email_students,
+                cohorts=list(cohorts) or None,
+            ))
+            if response is not None:
+                responses.append(response)
+        return responses
+
+    def close(self) -> List[dict]:
+        """ Sends the pending enrollments and stops accepting new ones.
+
+        Returns:
+            list with the response of each request sent, as returned by `change_enrollment`.
+        """
+        with self._lock:
+            self._closed = True
+        return self.flush()
+
+    def _send(self, kwargs: dict) -> dict:
+        """
+        Sends a bulk enrollment request, retrying it with exponential backoff if it could not connect.
+
+        Returns:
+            the response of `change_enrollment`, or None if the request failed.
+        """
+        retries = 0
+        while True:
+            try:
+                return self.client.change_enrollment(**kwargs)
+            except Exception as error:  # pylint: disable=broad-except
+                if retries >= self.max_retries or not _was_not_sent(error):
+                    self._report_error(error, kwargs)
+                    return None
+            time.sleep(self.max_delay_ms / 1000 * 2 ** retries)
+            retries += 1
+
+    def _report_error(self, error: Exception, kwargs: dict) -> None:
+        if self.on_error:
+            self.on_error(error, kwargs)
+        else:
+            logger.error("Error sending bulk %s of %s in %s", kwargs['action'], ','.join(kwargs['emails']),
+                         kwargs['courses'][0], exc_info=error)
+
+    def _schedule_flush(self) -> None:
+        """ Starts the timer of the next flush, if not started. Must be called with the lock held. """
+        if self._timer is None:
+            self._timer = threading.Timer(self.max_delay_ms / 1000, self._flush_in_background)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_in_background(self) -> None:
+        try:
+            self._notify(self.flush())
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Error sending pending bulk enrollments")
+
+    def _notify(self, responses: List[dict]) -> None:
+        if self.on_response:
+            for response in responses:
+                self.on_response(response)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._notify(self.close())
@@ -1,8 +1,19 @@
 import datetime
-import json
+import functools
+import hashlib
+import logging
+import threading
+import time
+from urllib.parse import urlencode
 
 import requests
 import requests.utils
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from openedx_rest_api_client.utils import JSONDecodeError, json_loads
+
+logger = logging.getLogger(__name__)
 
 # How long should we wait to connect to the auth service.
 # https://requests.readthedocs.io/en/master/user/advanced/#timeouts
@@ -13,7 +24,32 @@ REQUEST_READ_TIMEOUT = 5
 # sure to be valid at the time they are used.
 ACCESS_TOKEN_EXPIRED_THRESHOLD_SECONDS = 5
 
+# Session shared by all token requests, so that keep-alive connections to the OAuth endpoint are reused
+# across token refreshes instead of paying a new TCP and TLS handshake each time.
+_TOKEN_SESSION = requests.Session()
+_TOKEN_ADAPTER = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=10,
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.2,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(['POST']),
+        raise_on_status=False,
+    ),
+)
+_TOKEN_SESSION.mount('http://', _TOKEN_ADAPTER)
+_TOKEN_SESSION.mount('https://', _TOKEN_ADAPTER)
+
+
+def _utc_datetime(timestamp):
+    """
+    Returns the naive UTC datetime of a POSIX timestamp, as returned by ``datetime.utcnow()``.
+    """
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).replace(tzinfo=None)
+
 
+@functools.lru_cache(maxsize=32)
 def _get_oauth_url(url):
     """
     Returns the complete url for the oauth2 endpoint.
@@ -35,12 +71,50 @@ def _get_oauth_url(url):
     return stripped_url + '/oauth2/access_token'
 
 
+def _encode_token_request(client_id, client_secret, token_type, grant_type, refresh_token):
+    """
+    Returns the form encoded body of an access token request.
+    """
+    data = {
+        'grant_type': grant_type,
+        'client_id': client_id,
+        'client_secret': client_secret,
+        'token_type': token_type,
+    }
+    if refresh_token:
+        data['refresh_token'] = refresh_token
+    else:
+        assert grant_type != 'refresh_token', "refresh_token parameter required"
+
+    # Skip unset values, as requests does when encoding a dict.
+    return urlencode({key: value for key, value in data.items() if value is not None})
+
+
+def _parse_token_response(response):
+    """
+    Returns the access token and its lifetime in seconds from an access token response.
+
+    Raises:
+        requests.RequestException if the response is not successful or does not include a token.
+    """
+    if response.status_code >= 400:
+        response.raise_for_status()  # Raise an exception for bad status codes.
+
+    try:
+        data = json_loads(response.content)
+        return data['access_token'], data['expires_in']
+    except (KeyError, JSONDecodeError) as json_error:
+        raise requests.RequestException(response=response) from json_error
+
+
 def get_oauth_access_token(url: str, client_id: str, client_secret: str,
                            token_type: str = 'jwt',
                            grant_type: str = 'client_credentials',
                            refresh_token=None,
                            user_agent=None,
-                           timeout=(REQUEST_CONNECT_TIMEOUT, REQUEST_READ_TIMEOUT)) -> (str, datetime.datetime):
+                           timeout=(REQUEST_CONNECT_TIMEOUT, REQUEST_READ_TIMEOUT),
+                           session: requests.Session = None,
+                           encoded_body: str = None) -> (str, datetime.datetime):
     """ Retrieves OAuth 2.0 access token using the given grant type.
 
     Args:
@@ -53,6 +127,10 @@ def get_oauth_access_token(url: str, client_id: str, client_secret: str,
         user_agent (str): identifies the agent in the HTTP header
         timeout (tuple(float,float)): Requests timeout parameter for access token requests.
             (https://requests.readthedocs.io/en/master/user/advanced/#timeouts)
+        session (requests.Session): session used to post the token request. Defaults to a module level
+            session shared by all token requests.
+        encoded_body (str): form encoded request body, as built once by ``CachedToken``. If set, the
+            credential arguments are not encoded again.
 
     Raises:
         requests.RequestException if there is a problem retrieving the access token.
@@ -61,52 +139,53 @@ def get_oauth_access_token(url: str, client_id: str, client_secret: str,
         tuple: Tuple containing (access token string, expiration datetime).
 
     """
-    now = datetime.datetime.utcnow()
-    data = {
-        'grant_type': grant_type,
-        'client_id': client_id,
-        'client_secret': client_secret,
-        'token_type': token_type,
-    }
-    if refresh_token:
-        data['refresh_token'] = refresh_token
-    else:
-        assert grant_type != 'refresh_token', "refresh_token parameter required"
+    now = time.time()
+    if encoded_body is None:
+        encoded_body = _encode_token_request(client_id, client_secret, token_type, grant_type, refresh_token)
 
-    response = requests.post(
+    response = (session or _TOKEN_SESSION).post(
         _get_oauth_url(url),
-        data=data,
+        data=encoded_body,
         headers={
+            'Content-Type': 'application/x-www-form-urlencoded',
             'User-Agent': user_agent,
         },
         timeout=timeout
     )
-    response.raise_for_status()  # Raise an exception for bad status codes.
+    access_token, expires_in = _parse_token_response(response)
 
-    try:
-        data = response.json()
-        access_token = data['access_token']
-        expires_in = data['expires_in']
-    except (KeyError, json.decoder.JSONDecodeError) as json_error:
-        raise requests.RequestException(response=response) from json_error
-
-    expires_at = now + datetime.timedelta(seconds=expires_in)
+    expires_at = _utc_datetime(now + expires_in)
 
     return access_token, expires_at
 
 
 class CachedToken:
+    """
+    Caches an OAuth 2.0 access token in memory, and optionally in a cache backend shared by several processes.
+
+    The cache backend can be any object with these methods, e.g. a Django cache:
+        - ``get(key)``: returns the cached ``(access token, expiration datetime)`` tuple, or None.
+        - ``set(key, value, ttl)``: stores the tuple for ``ttl`` seconds.
+
+    With a shared backend, workers restarting or deployed together reuse the token stored by the first one
+    instead of requesting a new token each. Errors of the cache backend are logged as warnings, and the token
+    is then requested from the LMS.
+    """
 
     def __init__(self, url, client_id, client_secret, token_type='jwt',
                  grant_type='client_credentials',
                  refresh_token=None,
                  user_agent=None,
-                 timeout=(REQUEST_CONNECT_TIMEOUT, REQUEST_READ_TIMEOUT)):
+                 timeout=(REQUEST_CONNECT_TIMEOUT, REQUEST_READ_TIMEOUT),
+                 session=None,
+                 cache_backend=None):
 
         self.oauth_access_token = None
-        self.expiration = datetime.datetime.utcnow()
+        self.expiration = _utc_datetime(time.time())
+        self._expires_at_monotonic = 0.0
 
         self.url = url
+        self._oauth_url = _get_oauth_url(url)
         self.client_id = client_id
         self.client_secret = client_secret
         self.token_type = token_type
@@ -114,6 +193,24 @@ class CachedToken:
         self.refresh_token = refresh_token
         self.user_agent = user_agent
         self.timeout = timeout
+        self.session = session
+        self.cache_backend = cache_backend
+        self._cache_key = 'openedx-rest-api-client:token:' + hashlib.sha256(
+            f'{url}|{client_id}|{token_type}|{grant_type}'.encode()
+        ).hexdigest()
+
+        # Token request url, body and headers don't change between refreshes.
+        # The body is built on the first refresh.
+        self._encoded_body = None
+        self._headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+        if user_agent:
+            self._headers['User-Agent'] = user_agent
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def expires_at_monotonic(self) -> float:
+        """ ``time.monotonic()`` value until which the cached token can be used. """
+        return self._expires_at_monotonic
 
     def get_and_cache_oauth_access_token(self):
         """ Retrieves a possibly cached OAuth 2.0 access token using the given grant type.
@@ -131,29 +228,89 @@ class CachedToken:
             tuple: Tuple containing (access token string, expiration datetime).
 
         """
-        oauth_url = _get_oauth_url(self.url)
-
         # Attempt to get an unexpired cached access token
-        if self.oauth_access_token:
-            # Double-check the token hasn't already expired as a safety net.
-            adjusted_expiration = self.expiration - datetime.timedelta(seconds=ACCESS_TOKEN_EXPIRED_THRESHOLD_SECONDS)
-            if datetime.datetime.utcnow() < adjusted_expiration:
+        # The expiry deadline is kept on the monotonic clock, already adjusted by
+        # ACCESS_TOKEN_EXPIRED_THRESHOLD_SECONDS, so it is immune to wall clock changes.
+        if self.oauth_access_token and time.monotonic() < self._expires_at_monotonic:
+            return self.oauth_access_token, self.expiration
+
+        # Only one thread refreshes the token. The others wait for it and reuse the new token instead of
+        # requesting one each. The request is kept inside the lock on purpose.
+        with self._refresh_lock:
+            if self.oauth_access_token and time.monotonic() < self._expires_at_monotonic:
                 return self.oauth_access_token, self.expiration
 
-        # Get a new access token if no unexpired access token was found in the cache.
-        oauth_access_token_response = get_oauth_access_token(
-            oauth_url,
-            self.client_id,
-            self.client_secret,
-            grant_type=self.grant_type,
-            refresh_token=self.refresh_token,
-            user_agent=self.user_agent,
-            timeout=self.timeout,
-            token_type=self.token_type
+            if self.cache_backend is None or not self._load_from_cache_backend():
+                self._refresh()
+                if self.cache_backend is not None:
+                    self._store_in_cache_backend()
+
+            return self.oauth_access_token, self.expiration
+
+    def _load_from_cache_backend(self):
+        """
+        Loads the token stored in the cache backend, if any.
+
+        Returns:
+            bool: True if an unexpired token was loaded. False if the cache backend failed.
+
+        """
+        # The cache backend is optional, so its failures must not prevent getting a new token.
+        try:
+            cached = self.cache_backend.get(self._cache_key)
+        except Exception:  # pylint: disable=broad-except
+            logger.warning("Error reading the access token from the cache backend", exc_info=True)
+            return False
+        if not cached:
+            return False
+
+        access_token, expiration = cached
+        expires_in = expiration.replace(tzinfo=datetime.timezone.utc).timestamp() - time.time()
+        if expires_in <= 0:
+            return False
+
+        self.oauth_access_token = access_token
+        self.expiration = expiration
+        self._expires_at_monotonic = time.monotonic() + expires_in
+        return True
+
+    def _store_in_cache_backend(self):
+        """
+        Stores the current token in the cache backend for the rest of its lifetime. Failures are logged and ignored.
+        """
+        ttl = int(self._expires_at_monotonic - time.monotonic())
+        if ttl > 0:
+            try:
+                self.cache_backend.set(self._cache_key, (self.oauth_access_token, self.expiration), ttl)
+            except Exception:  # pylint: disable=broad-except
+                logger.warning("Error storing the access token in the cache backend", exc_info=True)
+
+    def _refresh(self):
+        """
+        Retrieves a new access token and caches it for the lifetime of the token.
+
+        Same request as ``get_oauth_access_token``, posted with the url, body and headers prepared for this token.
+
+        Raises:
+            requests.RequestException if there is a problem retrieving the access token.
+
+        """
+        if self._encoded_body is None:
+            self._encoded_body = _encode_token_request(
+                self.client_id, self.client_secret, self.token_type, self.grant_type, self.refresh_token
+            )
+
+        now = time.time()
+        started = time.monotonic()
+        response = (self.session or _TOKEN_SESSION).post(
+            self._oauth_url,
+            data=self._encoded_body,
+            headers=self._headers,
+            timeout=self.timeout
         )
+        access_token, expires_in = _parse_token_response(response)
 
         # Cache the new access token with an expiration matching the lifetime of the token.
-        self.oauth_access_token, expiration = oauth_access_token_response
-        self.expiration = expiration - (datetime.timedelta(seconds=ACCESS_TOKEN_EXPIRED_THRESHOLD_SECONDS))
-
-        return self.oauth_access_token, self.expiration
+        self.oauth_access_token = access_token
+        self.expiration = _utc_datetime(now + expires_in - ACCESS_TOKEN_EXPIRED_THRESHOLD_SECONDS)
+        self._expires_at_monotonic = started + expires_in - ACCESS_TOKEN_EXPIRED_THRESHOLD_SECONDS
@@ -1,12 +1,18 @@
-import json
+import functools
 import logging
-import requests.exceptions
+import threading
+import time
+import uuid
+import requests
 
-from typing import List
-from urllib.parse import urljoin, urlparse, parse_qs
-from requests_toolbelt.multipart.encoder import MultipartEncoder
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Union
+from urllib.parse import urljoin
 
-from openedx_rest_api_client.session import OAuthAPISession
+from openedx_rest_api_client.session import DEFAULT_POOL_MAXSIZE, OAuthAPISession
+from openedx_rest_api_client.utils import json_dumps, response_json
 
 logger = logging.getLogger(__name__)
 # URLs
@@ -50,6 +56,79 @@ URL_ACCOUNT_REGISTRATION = '/api/user/v1/account/registration/'
 
 URL_COURSE_GRADES = '/api/grades/v1/courses/{course_id}/'
 
+# Headers of url encoded form posts. requests merges them into a new dict, so they are never modified.
+FORM_URLENCODED_HEADERS = {'Content-Type': 'application/x-www-form-urlencoded'}
+
+# Bulk enrollments of more emails than this are split in several concurrent requests.
+DEFAULT_ENROLLMENT_CHUNK_SIZE = 500
+DEFAULT_ENROLLMENT_MAX_WORKERS = 8
+
+
+def _fmt(template: str, **kwargs) -> str:
+    """ Fills a URL template. """
+    return template.format_map(kwargs)
+
+
+def _csv(values: Union[str, Iterable[str]]) -> str:
+    """ Returns values as a comma separated string. Strings are assumed to be already joined. """
+    return values if isinstance(values, str) else ','.join(values)
+
+
+def _merge_enrollment_responses(chunks: List[List[str]], responses: List[dict]) -> dict:
+    """
+    Merges the responses of bulk enrollment requests for the same courses and different chunks of emails.
+    The results of the successful requests are merged, and the unsuccessful ones are listed in 'failed_chunks'
+    with the emails they were sent for. If all of them failed, the error of the first one is also returned
+    at the top level, as for a single request.
+    """
+    merged = {}
+    failed_chunks = []
+    for chunk, response in zip(chunks, responses):
+        if 'courses' not in response:
+            failed_chunks.append({'identifiers': chunk, **response})
+            continue
+        if not merged:
+            merged = dict(response)
+            merged['courses'] = {}
+        for course_id, course_data in response['courses'].items():
+            merged_course = merged['courses'].setdefault(course_id, {**course_data, 'results': []})
+            merged_course['results'].extend(course_data.get('results', []))
+    if failed_chunks:
+        if not merged:
+            merged = {'status_code': failed_chunks[0].get('status_code'), 'response': failed_chunks[0].get('response')}
+        merged['failed_chunks'] = failed_chunks
+    return merged
+
+
+def _log_post_error(kind: str, response: requests.Response, endpoint: str, params: dict) -> None:
+    """ Logs the error of an unsuccessful post of params encoded as kind (e.g. 'form' or 'json'). """
+    # Only decode the response and encode the params if the error is going to be logged.
+    if response.status_code != 200 and logger.isEnabledFor(logging.ERROR):
+        logger.error("Error %s in post %s to %s with params %s: %s",
+                     response.status_code, kind, endpoint, json_dumps(params).decode(), response.text)
+
+
+@functools.lru_cache(maxsize=1024)
+def _course_grades_path(course_id: str) -> str:
+    """ Returns the grades endpoint path of a course. """
+    return _fmt(URL_COURSE_GRADES, course_id=course_id)
+
+
+def _abs_url(base: str, path: str) -> str:
+    """
+    Returns the absolute url of path, relative to base. Same as urljoin(base, path), but without parsing
+    the urls in the usual case of an absolute path without dot segments, parameters or empty query or
+    fragment, on a base url with no path, query or fragment. Absolute http(s) urls are returned as they are.
+    """
+    if path.startswith(('http://', 'https://')):
+        return path
+    stripped_base = base.rstrip('/')
+    if (path.startswith('/') and not path.startswith('//') and '/.' not in path
+            and ';' not in path and not path.endswith(('?', '#')) and '?#' not in path
+            and stripped_base.count('/') == 2 and '?' not in base and '#' not in base):
+        return stripped_base + path
+    return urljoin(base, path)
+
 
 class OpenedxRESTAPIClient:
     """ A client to access Open edX REST API endpoints.
@@ -66,12 +145,33 @@ class OpenedxRESTAPIClient:
     https://github.com/edx/edx-platform/blob/161e3560dde9edf1c2bacedf2dd442dc077a8cbf/docs/swagger.yaml
 
     """
+    __slots__ = (
+        '_base_url',
+        '_courses_url',
+        '_pool_maxsize',
+        '_catalog_cache',
+        '_catalog_cache_ttl',
+        '_catalog_lock',
+        '_multipart',
+        '_session',
+        '_session_args',
+        '_session_lock',
+    )
+
+    # Clients returned by get_shared, keyed by LMS and credentials.
+    _shared = {}
+    _shared_lock = threading.Lock()
+
     def __init__(self,
                  base_url: str,
                  client_id: str,
                  client_secret: str,
                  timeout: (float, float) = None,
                  bearer: bool = True,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 cache_catalog: bool = False,
+                 catalog_cache_ttl: float = None,
+                 session: OAuthAPISession = None,
                  **kwargs) -> None:
         """ Opens a session with the LMS
 
@@ -80,15 +180,84 @@ class OpenedxRESTAPIClient:
             client_id: Client Id. Created in <lms base url>/admin/oauth2/client/
             client_secret: Client secret for the client Id.
             bearer: If True, it will request a bearer token. Otherwise it will request a jwt token.
+            pool_maxsize: maximum number of connections kept open to the LMS. Raise it when the client
+                is shared by more threads than this.
+            cache_catalog: If True, `list_all_courses` keeps the last list returned for each set of filters
+                and requests the first page with the ETag it was returned with. If the LMS answers
+                304 Not Modified, the cached list is returned without loading the other pages.
+                Note that the ETag only covers the first page of the list.
+            catalog_cache_ttl: If set, cached course lists younger than this number of seconds are returned
+                without any request. Useful if the LMS does not send ETags.
+            session: session to use instead of creating a new one, e.g. from `get_default_session`.
+                The session keeps the options it was created with, so client_id, client_secret, timeout,
+                bearer and kwargs are not used. pool_maxsize is only used to limit the number of concurrent
+                requests, so pass the pool size of the session if it is not the default.
             **kwargs: are passed to :class:`session.OAuthAPISession`
 
 
         """
         self._base_url = base_url
-        self.session = OAuthAPISession(base_url, client_id, client_secret,
-                                       timeout,
-                                       bearer,
-                                       **kwargs)
+        self._courses_url = _abs_url(base_url, URL_COURSES_LIST)
+        self._pool_maxsize = pool_maxsize
+        # Course lists by query parameters, as (etag, courses, monotonic time stored), if cache_catalog is set.
+        self._catalog_cache = {} if cache_catalog else None
+        self._catalog_cache_ttl = catalog_cache_ttl
+        self._catalog_lock = threading.Lock()
+        # Random boundary of multipart posts and its content type header, generated on the first one.
+        self._multipart = None
+        # Unless supplied, the session is created on first use.
+        self._session = session
+        self._session_args = (base_url, client_id, client_secret, timeout, bearer, kwargs)
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self) -> OAuthAPISession:
+        """ Session with the LMS, created on first use. """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    base_url, client_id, client_secret, timeout, bearer, kwargs = self._session_args
+                    self._session = OAuthAPISession(base_url, client_id, client_secret,
+                                                    timeout,
+                                                    bearer,
+                                                    pool_maxsize=self._pool_maxsize,
+                                                    **kwargs)
+        return self._session
+
+    @session.setter
+    def session(self, session: OAuthAPISession) -> None:
+        self._session = session
+
+    @classmethod
+    def get_shared(cls,
+                   base_url: str,
+                   client_id: str,
+                   client_secret: str,
+                   timeout: (float, float) = None,
+                   bearer: bool = True,
+                   **kwargs) -> 'OpenedxRESTAPIClient':
+        """ Returns a client shared by all callers using the same LMS and credentials.
+
+        The client is created on the first call and reused afterwards, so its connection pool
+        and its cached access token are shared. Use this instead of creating a new client per request
+        (e.g. in web views): threads sharing the client reuse the open connections, and only one of
+        them refreshes the access token when it expires.
+
+        Args:
+            Same as the constructor. timeout and kwargs are only used when the client is created.
+
+        Returns:
+            OpenedxRESTAPIClient
+        """
+        key = (base_url, client_id, client_secret, bearer)
+        client = cls._shared.get(key)
+        if client is None:
+            with cls._shared_lock:
+                client = cls._shared.get(key)
+                if client is None:
+                    client = cls(base_url, client_id, client_secret, timeout, bearer, **kwargs)
+                    cls._shared[key] = client
+        return client
 
     def _post_form(self, path:str, params:dict, url:str=None) -> requests.Response:
         """
@@ -101,21 +270,45 @@ class OpenedxRESTAPIClient:
         Returns:
             response
         """
-        data = MultipartEncoder(fields=params)
+        # Imported here, as only multipart posts need requests_toolbelt.
+        from requests_toolbelt.multipart.encoder import MultipartEncoder  # pylint: disable=import-outside-toplevel
 
-        headers = {
-            'Content-Type': data.content_type
-        }
+        multipart = self._multipart
+        if multipart is None:
+            boundary = uuid.uuid4().hex
+            multipart = self._multipart = (boundary, {'Content-Type': f'multipart/form-data; boundary={boundary}'})
+        boundary, headers = multipart
+
+        data = MultipartEncoder(fields=params, boundary=boundary)
 
-        endpoint = urljoin(url if url else self._base_url, path)
+        endpoint = _abs_url(url if url else self._base_url, path)
         response = self.session.post(
             headers=headers,
             url=endpoint,
             data=data,
         )
-        if response.status_code != 200:
-            logger.error(f"Error {response.status_code} in post form to {endpoint} with params {json.dumps(params)}: "
-                         f"{response.text}")
+        _log_post_error('form', response, endpoint, params)
+
+        return response
+
+    def _post_urlencoded(self, path: str, params: dict, url: str = None) -> requests.Response:
+        """
+        Sends a post with application/x-www-form-urlencoded encoding.
+        Args:
+            path: path of the API endpoint.
+            params: dict with data to post.
+            url: base url. If empty, will take the base url.
+
+        Returns:
+            response
+        """
+        endpoint = _abs_url(url if url else self._base_url, path)
+        response = self.session.post(
+            headers=FORM_URLENCODED_HEADERS,
+            url=endpoint,
+            data=params,
+        )
+        _log_post_error('form', response, endpoint, params)
 
         return response
 
@@ -130,14 +323,13 @@ class OpenedxRESTAPIClient:
         Returns:
             response
         """
-        endpoint = urljoin(url if url else self._base_url, path)
+        endpoint = _abs_url(url if url else self._base_url, path)
+        # The session already sends the application/json content type, so post the encoded bytes directly.
         response = self.session.post(
             url=endpoint,
-            json=params,
+            data=json_dumps(params),
         )
-        if response.status_code != 200:
-            logger.error(f"Error {response.status_code} in post json to {endpoint} with params {json.dumps(params)}: "
-                         f"{response.text}")
+        _log_post_error('json', response, endpoint, params)
 
         return response
 
@@ -145,6 +337,7 @@ class OpenedxRESTAPIClient:
                          org: str = None,
                          username: str = None,
                          search_term: str = None,
+                         max_workers: int = 1,
                          **kwargs
                          ) -> List[dict]:
         # pylint: disable=line-too-long
@@ -157,6 +350,8 @@ class OpenedxRESTAPIClient:
             username: The name of the user the logged-in user would like to be identified as
             search_term: Search term to filter courses (used by ElasticSearch).
                 ENABLE_COURSEWARE_SEARCH feature must be enabled in LMS.
+            max_workers: If greater than 1, the pages after the first one are requested concurrently
+                by up to this many threads (limited by the connection pool size). Defaults to 1.
             kwargs: If specified, visible `CourseOverview` objects are filtered by the given key-value pairs.
                 Not all fields are supported for filtering. See https://github.com/edx/edx-platform/blob/fb8b03178cce836186fc74e17c010cae99738d23/lms/djangoapps/course_api/forms.py#L48
 
@@ -201,59 +396,186 @@ class OpenedxRESTAPIClient:
 
         """
 
-        def _get_courses(url, params_=None):
-            """ Recursively load all pages of course data. """
-            response = self.session.get(urljoin(url, URL_COURSES_LIST), params=params_)
-            response.raise_for_status()
+        params = self._course_list_params(org, username, search_term, kwargs)
+        if self._catalog_cache is None:
+            first_page = response_json(self._get(self._courses_url, params))
+            return list(self._iter_courses(first_page, params, max_workers))
 
-            data = response.json()
-            results = data.get("results", [])
-            next_page_url = data.get("pagination", {}).get("next")
-            if next_page_url:
-                next_page = urlparse(next_page_url)
-                results += _get_courses(next_page_url, parse_qs(next_page.query))
+        key = tuple(sorted(params.items()))
+        with self._catalog_lock:
+            cached = self._catalog_cache.get(key)
 
-            return results
+        headers = None
+        if cached:
+            etag, courses, stored_at = cached
+            if self._catalog_cache_ttl is not None and time.monotonic() - stored_at < self._catalog_cache_ttl:
+                return list(courses)
+            if etag:
+                headers = {'If-None-Match': etag}
 
-        params = {}
-        if org:
-            params['org'] = org
-        if username:
-            params['username'] = username
-        if kwargs:
-            params['filter_'] = str(kwargs)
-        if search_term:
-            params['search_term'] = search_term
-        course_list = _get_courses(self._base_url, params)
+        response = self._get(self._courses_url, params, headers=headers)
+        if response.status_code == 304 and cached:
+            with self._catalog_lock:
+                self._catalog_cache[key] = (etag, courses, time.monotonic())
+            return list(courses)
+
+        courses = list(self._iter_courses(response_json(response), params, max_workers))
+        with self._catalog_lock:
+            self._catalog_cache[key] = (response.headers.get('ETag'), courses, time.monotonic())
 
-        return course_list
+        return list(courses)
+
+    def iter_all_courses(self,
+                         org: str = None,
+                         username: str = None,
+                         search_term: str = None,
+                         max_workers: int = 1,
+                         **kwargs
+                         ) -> Iterator[dict]:
+        """
+        Iterate over the courses visible to the requesting user, loading one page at a time.
+        Calls the /api/courses/v1/courses LMS endpoint
+
+        Takes the same arguments as `list_all_courses`, but yields each course dict as its page arrives
+        instead of building the full list, so only one page is held in memory at a time, or up to
+        max_workers + 1 pages if max_workers is greater than 1.
+
+        Returns:
+            Iterator of course dicts, in the form returned by `list_all_courses`.
+        """
+        params = self._course_list_params(org, username, search_term, kwargs)
+        first_page = response_json(self._get(self._courses_url, params))
+        yield from self._iter_courses(first_page, params, max_workers)
+
+    @staticmethod
+    def _course_list_params(org: str, username: str, search_term: str, filters: dict) -> dict:
+        """ Returns the query parameters of the course list endpoint. """
+        return {key: value for key, value in (
+            ('org', org),
+            ('username', username),
+            ('filter_', json_dumps(filters).decode() if filters else None),
+            ('search_term', search_term),
+        ) if value}
+
+    def _get(self, url: str, params: dict = None, headers: dict = None) -> requests.Response:
+        """
+        Sends a get request.
+        Args:
+            url: url of the API endpoint.
+            params: query parameters.
+            headers: additional request headers.
+
+        Raises:
+            requests.HTTPError if the response has an error status code.
+
+        Returns:
+            response
+        """
+        response = self.session.get(url, params=params, headers=headers)
+        if response.status_code >= 400:
+            response.raise_for_status()
+        return response
+
+    def _get_courses_page(self, params: dict, page: int) -> dict:
+        """ Returns a decoded page of the course list. """
+        return response_json(self._get(self._courses_url, {**params, 'page': page}))
+
+    def _iter_courses(self, first_page: dict, params: dict, max_workers: int) -> Iterator[dict]:
+        """
+        Iterates over the courses of a course list, loading the pages after first_page.
+        Args:
+            first_page: decoded first page of the course list.
+            params: query parameters of the first page.
+            max_workers: maximum number of pages loaded concurrently.
+
+        Returns:
+            Iterator of course dicts.
+        """
+        yield from first_page.get("results", [])
+
+        pagination = first_page.get("pagination", {})
+        num_pages = pagination.get("num_pages") or 1
+        if max_workers > 1 and num_pages > 1:
+            # The number of pages is known, so request the remaining ones concurrently, keeping their order.
+            # Only `workers` pages are requested ahead of the one being iterated, so the pages are not all
+            # held in memory and a caller that stops early does not wait for all of them.
+            workers = min(max_workers, self._pool_maxsize, num_pages - 1)
+            pages = iter(range(2, num_pages + 1))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                in_flight = deque(
+                    executor.submit(self._get_courses_page, params, page) for page in islice(pages, workers)
+                )
+                try:
+                    while in_flight:
+                        data = in_flight.popleft().result()
+                        for page in islice(pages, 1):
+                            in_flight.append(executor.submit(self._get_courses_page, params, page))
+                        yield from data.get("results", [])
+                finally:
+                    for future in in_flight:
+                        future.cancel()
+            return
+
+        next_page_url = pagination.get("next")
+        while next_page_url:
+            # The next page url already includes the query string. It is usually absolute, and used as is.
+            data = response_json(self._get(_abs_url(self._base_url, next_page_url)))
+            yield from data.get("results", [])
+            next_page_url = data.get("pagination", {}).get("next")
 
     def change_enrollment(self,
-                          emails: List[str],
-                          courses: List[str],
+                          emails: Union[str, Iterable[str]],
+                          courses: Union[str, Iterable[str]],
                           action: str = 'enroll',
                           url: str = None,
                           auto_enroll: bool = True,
                           email_students: bool = True,
-                          cohorts: List[str] = None) -> dict:
+                          cohorts: Union[str, Iterable[str]] = None,
+                          chunk_size: int = DEFAULT_ENROLLMENT_CHUNK_SIZE,
+                          max_workers: int = DEFAULT_ENROLLMENT_MAX_WORKERS) -> dict:
         """ Enroll or unenroll (depending on the value of action) the list of emails in the list of courses.
         Calls the /api/bulk_enroll/v1/bulk_enroll/ LMS endpoint
 
+        Lists of more than chunk_size emails are sent in several requests of up to chunk_size emails,
+        up to max_workers of them at a time, and their results are merged in a single response.
+
         Args:
-            emails: list of emails to enroll
-            courses: list of course ids to enroll
+            emails: list of emails to enroll, or a string of comma separated emails
+            courses: list of course ids to enroll, or a string of comma separated course ids
             action: can be 'enroll' or 'unenroll'
             url: url of the LMS (base or site). If not specified, uses the base url of the session.
                 Defaults to the LMS base.
             auto_enroll: if true, the users will be automatically enrolled as soon as they register.
                 Defaults to true.
             email_students: if true, an email will be sent with the update. Defaults to true.
-            cohorts: List of cohort names to add the students to.
+            cohorts: List of cohort names to add the students to, or a string of comma separated names.
+            chunk_size: maximum number of emails sent per request. Defaults to 500.
+            max_workers: maximum number of requests sent concurrently. Defaults to 8.
 
         Returns:
             dict in the form:
+            - If the request is not successful:
+            { 'status_code': <status code>, 'response': <response text> }
             - If the course does not exist:
             { 'detail': 'Not found' }
+            - If the emails were sent in several requests and some of them failed or raised a
+            requests.RequestException, the results of the successful ones and the errors of the others,
+            with the emails they were sent for. The status code is None for requests that raised.
+            If all of them failed, 'status_code' and 'response' are those of the first one, and
+            'failed_chunks' lists all of them:
+            {
+               "action":"enroll",
+               "courses":{ ... },
+               ...
+               "failed_chunks":[
+                  {
+                     "identifiers":["mail@example.com", ...],
+                     "status_code":<status code>,
+                     "response":<response text>
+                  },
+                  ...
+               ]
+            }
             - If successful:
             {
                "action":"enroll",
@@ -291,16 +613,81 @@ class OpenedxRESTAPIClient:
             "auto_enroll": auto_enroll,
             "email_students": email_students,
             "action": action,
-            "courses": ','.join(courses),
-            "identifiers": ','.join(emails)
+            "courses": _csv(courses),
         }
         if cohorts:
-            data['cohorts'] = ','.join(cohorts)
+            data['cohorts'] = _csv(cohorts)
+
+        emails = emails.split(',') if isinstance(emails, str) else list(emails)
+        if len(emails) <= chunk_size:
+            return self._post_enrollment({**data, "identifiers": ','.join(emails)}, url)
+
+        def post_chunk(chunk: List[str]) -> dict:
+            try:
+                return self._post_enrollment({**data, "identifiers": ','.join(chunk)}, url)
+            except requests.RequestException as error:
+                # Other chunks may have been applied already, so the error is returned with their results.
+                return {
+                    'status_code': error.response.status_code if error.response is not None else None,
+                    'response': str(error),
+                }
+
+        chunks = [emails[start:start + chunk_size] for start in range(0, len(emails), chunk_size)]
+        workers = min(max_workers, self._pool_maxsize, len(chunks))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            responses = list(executor.map(post_chunk, chunks))
+
+        return _merge_enrollment_responses(chunks, responses)
+
+    def change_enrollment_many(self,
+                               emails_batches: Iterable[Union[str, Iterable[str]]],
+                               courses: Union[str, Iterable[str]],
+                               action: str = 'enroll',
+                               url: str = None,
+                               auto_enroll: bool = True,
+                               email_students: bool = True,
+                               cohorts: Union[str, Iterable[str]] = None) -> List[dict]:
+        """ Enroll or unenroll several batches of emails in the same list of courses.
+        Calls the /api/bulk_enroll/v1/bulk_enroll/ LMS endpoint once per batch.
+
+        The courses and cohorts are joined once and reused for all the batches, so only the emails
+        are encoded again for each call.
 
+        Args:
+            emails_batches: iterable of lists of emails to enroll
+            courses, action, url, auto_enroll, email_students, cohorts: see `change_enrollment`
+
+        Returns:
+            list with one dict per batch, in the form returned by `change_enrollment`
+        """
+        base_data = {
+            "auto_enroll": auto_enroll,
+            "email_students": email_students,
+            "action": action,
+            "courses": _csv(courses),
+        }
+        if cohorts:
+            base_data['cohorts'] = _csv(cohorts)
+
+        return [
+            self._post_enrollment({**base_data, "identifiers": _csv(emails)}, url)
+            for emails in emails_batches
+        ]
+
+    def _post_enrollment(self, data: dict, url: str = None) -> dict:
+        """
+        Posts a bulk enrollment request.
+        Args:
+            data: bulk enrollment payload.
+            url: base url. If empty, will take the base url.
+
+        Returns:
+            response data, or the status code and text of the response if not successful.
+        """
         response = self._post_json(path=URL_BULKENROLL, params=data, url=url)
 
         if response.status_code == 200:
-            return response.json()
+            return response_json(response)
         else:
             return {
                 'status_code': response.status_code,
@@ -380,29 +767,42 @@ class OpenedxRESTAPIClient:
 
         params.update(kwargs)
 
-        response = self._post_form(path=URL_ACCOUNT_REGISTRATION, url=url, params=params)
+        response = self._post_urlencoded(path=URL_ACCOUNT_REGISTRATION, url=url, params=params)
 
-        return response.json()
+        return response_json(response)
 
     def get_course_grades(self, course_id, username=None) -> List[dict]:
-        def _get_course_grades(url, _course_id, _params=None):
-            """ Recursively load all grades for a course. """
-            response = self.session.get(urljoin(url, URL_COURSE_GRADES.format(course_id=_course_id)), params=_params)
-            response.raise_for_status()
-            data = response.json()
-            if isinstance(data, dict):
-                results = data.get('results', [])
-                if next_page_url := data.get('next'):
-                    results += _get_course_grades(next_page_url, _course_id, parse_qs(urlparse(next_page_url).query))
-            else:
-                results = data
-            return results
+        return list(self.iter_course_grades(course_id, username))
+
+    def iter_course_grades(self, course_id, username=None) -> Iterator[dict]:
+        """
+        Iterate over the grades of a course, loading one page at a time.
+        Calls the /api/grades/v1/courses/{course_id}/ LMS endpoint
+
+        Takes the same arguments as `get_course_grades`, but yields each grade as its page arrives
+        instead of building the full list.
 
+        Returns:
+            Iterator of grade dicts, in the form returned by `get_course_grades`.
+        """
         params = {}
         if username:
             params['username'] = username
 
-        return _get_course_grades(self._base_url, course_id, params)
+        url = _abs_url(self._base_url, _course_grades_path(course_id))
+        while url:
+            data = response_json(self._get(url, params))
+            if not isinstance(data, dict):
+                # Not paginated
+                yield from data
+                break
+            yield from data.get('results', [])
+            next_page_url = data.get('next')
+            if not next_page_url:
+                break
+            # The next page url already includes the query string. It is usually absolute, and used as is.
+            url = _abs_url(self._base_url, next_page_url)
+            params = None
 
     def validation_registration(self, url: str = None, **kwargs) -> dict:
         """
@@ -438,4 +838,19 @@ class OpenedxRESTAPIClient:
         """
         response = self._post_json(path=URL_VALIDATION_REGISTRATION, params=kwargs, url=url)
 
-        return response.json()
+        return response_json(response)
+
+
+def get_default_session(base_url: str,
+                        client_id: str,
+                        client_secret: str,
+                        timeout: (float, float) = None,
+                        bearer: bool = True,
+                        **kwargs) -> OAuthAPISession:
+    """
+    Returns the session of the client returned by `OpenedxRESTAPIClient.get_shared` for the same arguments.
+
+    Pass it to :class:`OpenedxRESTAPIClient` to reuse its connections and access token when clients
+    are created repeatedly, e.g. once per task in a worker process.
+    """
+    return OpenedxRESTAPIClient.get_shared(base_url, client_id, client_secret, timeout, bearer, **kwargs).session
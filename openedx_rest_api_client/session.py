@@ -1,8 +1,16 @@
+import collections
+import functools
 import os
 import socket
+import threading
+import time
+
+from typing import MutableMapping
 
 import requests
 import requests.utils
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from openedx_rest_api_client.auth import SuppliedJwtAuth, BearerAuth
 from openedx_rest_api_client.cached_token import CachedToken
@@ -14,7 +22,49 @@ from openedx_rest_api_client.__version__ import __version__
 REQUEST_CONNECT_TIMEOUT = 3.05
 REQUEST_READ_TIMEOUT = 5
 
+# Maximum number of connections kept open to each host.
+DEFAULT_POOL_MAXSIZE = 50
+
+# Number of responses kept by the HTTP cache, if enabled and no cache is supplied.
+DEFAULT_HTTP_CACHE_SIZE = 256
+
+# A response cached by the HTTP cache.
+CachedResponse = collections.namedtuple('CachedResponse', ['etag', 'last_modified', 'headers', 'content'])
+
+
+class _LRUCache(collections.OrderedDict):
+    """
+    A mapping that keeps up to maxsize items, discarding the least recently used first.
+    """
+
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
 
+def _host_address():
+    """
+    Return the address of this host, or its name if it can't be resolved.
+    """
+    hostname = socket.gethostname()
+    try:
+        return socket.gethostbyname(hostname)
+    except OSError:
+        return hostname
+
+
+@functools.lru_cache(maxsize=None)
 def user_agent():
     """
     Return a User-Agent that identifies this client.
@@ -25,10 +75,12 @@ def user_agent():
     The last item in the list will be the application name, taken from the
     OS environment variable EDX_REST_API_CLIENT_NAME. If that environment
     variable is not set, it will default to the hostname.
+
+    It is computed on first use, as resolving the host name can block, and cached afterwards.
     """
     client_name = 'unknown_client_name'
     try:
-        client_name = os.environ.get("EDX_REST_API_CLIENT_NAME") or socket.gethostbyname(socket.gethostname())
+        client_name = os.environ.get("EDX_REST_API_CLIENT_NAME") or _host_address()
     except:  # pylint: disable=bare-except
         pass  # using 'unknown_client_name' is good enough.  no need to log.
     return "{} edx-rest-api-client/{} {}".format(
@@ -38,7 +90,11 @@ def user_agent():
     )
 
 
-USER_AGENT = user_agent()
+def __getattr__(name):
+    # USER_AGENT is computed on first access instead of on import.
+    if name == 'USER_AGENT':
+        return user_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class OAuthAPISession(requests.Session):
@@ -78,6 +134,10 @@ class OAuthAPISession(requests.Session):
                  client_secret: str,
                  timeout: (float, float) = (REQUEST_CONNECT_TIMEOUT, REQUEST_READ_TIMEOUT),
                  bearer: bool = False,
+                 token_cache_backend=None,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 enable_http_cache: bool = False,
+                 http_cache: MutableMapping = None,
                  **kwargs) -> None:
         """
         Args:
@@ -89,11 +149,35 @@ class OAuthAPISession(requests.Session):
             client_secret (str): Client secret
             timeout (tuple(float,float)): Requests timeout parameter for access token requests.
                 (https://requests.readthedocs.io/en/master/user/advanced/#timeouts)
+            token_cache_backend: optional cache shared by several processes to store the access token.
+                See :class:`cached_token.CachedToken`.
+            pool_maxsize (int): maximum number of connections kept open to each host. Raise it when the
+                session is shared by more threads than this.
+            enable_http_cache (bool): If True, GET responses with an ETag or Last-Modified header are cached,
+                and requested again with If-None-Match or If-Modified-Since. If the server answers
+                304 Not Modified, the cached response is returned as a 200 response.
+            http_cache (MutableMapping): mapping used by the HTTP cache, e.g. a ``cachetools.LRUCache``.
+                Defaults to an in-memory cache of the last 256 responses.
 
         """
         super().__init__(**kwargs)
-        self.headers['user-agent'] = USER_AGENT
-        self.headers['Content-Type'] = "application/JSON"
+        # Only idempotent requests are retried, so that enrollments and registrations are never sent twice.
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=pool_maxsize,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset(['GET']),
+                raise_on_status=False,
+            ),
+        )
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+        self.headers['user-agent'] = user_agent()
+        self.headers['Content-Type'] = "application/json"
+        self.headers['Accept'] = "application/json"
 
         if bearer:
             self.auth = BearerAuth(None)
@@ -106,8 +190,18 @@ class OAuthAPISession(requests.Session):
         self._client_id = client_id
         self._client_secret = client_secret
         self._timeout = timeout
+        self._token_cache_backend = token_cache_backend
 
         self._access_token = None
+        self._access_token_lock = threading.Lock()
+        # Monotonic time until which auth.token is known to be valid.
+        self._token_expiry = 0.0
+
+        # Cached GET responses by url, as CachedResponse.
+        self._http_cache = None
+        if enable_http_cache:
+            self._http_cache = http_cache if http_cache is not None else _LRUCache(DEFAULT_HTTP_CACHE_SIZE)
+        self._http_cache_lock = threading.Lock()
 
     def get_base_url(self) -> str:
         return self._base_url
@@ -120,23 +214,31 @@ class OAuthAPISession(requests.Session):
             requests.RequestException if there is a problem retrieving the access token.
 
         """
+        if time.monotonic() < self._token_expiry:
+            return
 
         if not self._access_token:
-            oauth_url = self._base_url if not self.oauth_uri else self._base_url + self.oauth_uri
-
-            self._access_token = CachedToken(
-                oauth_url,
-                self._client_id,
-                self._client_secret,
-                grant_type='client_credentials',
-                user_agent=USER_AGENT,
-                timeout=self._timeout,
-                token_type=self._token_type
-            )
-
-        oauth_access_token_response = self._access_token.get_and_cache_oauth_access_token()
-
-        self.auth.token, _ = oauth_access_token_response
+            # Create a single CachedToken, even if several threads get here at once.
+            with self._access_token_lock:
+                if not self._access_token:
+                    oauth_url = self._base_url if not self.oauth_uri else self._base_url + self.oauth_uri
+
+                    self._access_token = CachedToken(
+                        oauth_url,
+                        self._client_id,
+                        self._client_secret,
+                        grant_type='client_credentials',
+                        user_agent=user_agent(),
+                        timeout=self._timeout,
+                        token_type=self._token_type,
+                        cache_backend=self._token_cache_backend
+                    )
+
+        token, _ = self._access_token.get_and_cache_oauth_access_token()
+
+        if token != self.auth.token:
+            self.auth.token = token
+        self._token_expiry = self._access_token.expires_at_monotonic
 
     def get_jwt_access_token(self):
         """
@@ -161,4 +263,52 @@ class OAuthAPISession(requests.Session):
 
         """
         self._ensure_authentication()
+        if self._http_cache is not None and method.upper() == 'GET' and not kwargs.get('stream'):
+            return self._cached_get(url, **kwargs)
         return super().request(method, url, **kwargs)
+
+    def _cached_get(self, url, params=None, headers=None, **kwargs):
+        """
+        Sends a conditional GET request, using the HTTP cache.
+
+        Requests with their own If-None-Match or If-Modified-Since headers, in any case, are sent unchanged.
+        """
+        headers = requests.structures.CaseInsensitiveDict(headers or {})
+        if 'If-None-Match' in headers or 'If-Modified-Since' in headers:
+            return super().request('GET', url, params=params, headers=headers, **kwargs)
+
+        prepared = requests.PreparedRequest()
+        prepared.prepare_url(url, params)
+        key = prepared.url
+
+        with self._http_cache_lock:
+            try:
+                cached = self._http_cache[key]
+            except KeyError:
+                cached = None
+
+        if cached:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+
+        response = super().request('GET', key, headers=headers, **kwargs)
+
+        if response.status_code == 304 and cached:
+            # Return the cached response, updated with the headers of the 304 response.
+            response.headers = requests.structures.CaseInsensitiveDict({**cached.headers, **response.headers})
+            response.status_code = 200
+            response.reason = 'OK'
+            response._content = cached.content  # pylint: disable=protected-access
+        elif response.status_code == 200:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                with self._http_cache_lock:
+                    self._http_cache[key] = CachedResponse(
+                        etag, last_modified, dict(response.headers), response.content
+                    )
+
+        return response
+
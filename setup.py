@@ -62,4 +62,7 @@ setup(
     license='Apache',
     packages=find_packages(exclude=['*.tests']),
     install_requires=load_requirements('requirements.txt'),
+    extras_require={
+        'orjson': ['orjson'],
+    },
 )